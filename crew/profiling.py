@@ -0,0 +1,218 @@
+"""On-demand, per-invocation sampling profiler for KYC screening runs."""
+import contextvars
+import functools
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_MS = 10.0
+
+_active_profile: contextvars.ContextVar[Optional["InvocationProfile"]] = contextvars.ContextVar(
+    "kyc_active_profile", default=None
+)
+
+
+def should_profile(payload: dict) -> bool:
+    """Decide whether this invocation is profiled.
+
+    A ``profile`` key of ``true`` or ``1`` (or the string "true"/"1") in the payload always
+    enables profiling. Otherwise KYC_PROFILE_SAMPLE_RATE (0.0-1.0, default 0) samples a
+    fraction of invocations.
+    """
+    flag = payload.get("profile")
+    if flag is True or (not isinstance(flag, bool) and isinstance(flag, int) and flag == 1):
+        return True
+    if isinstance(flag, str) and flag.strip().lower() in ("true", "1"):
+        return True
+    try:
+        rate = float(os.environ.get("KYC_PROFILE_SAMPLE_RATE", "0") or 0)
+    except ValueError:
+        logger.warning("Ignoring invalid KYC_PROFILE_SAMPLE_RATE")
+        return False
+    return rate > 0 and random.random() < rate
+
+
+def _code_label(code) -> str:
+    """Label a code object as 'qualname (file:firstline)', safe for collapsed-stack output."""
+    name = getattr(code, "co_qualname", code.co_name)
+    filename = os.path.basename(code.co_filename)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _resolve_interval(interval_ms) -> float:
+    """Return a finite, positive sampling interval in ms, falling back to the default on invalid values.
+
+    When interval_ms is None, KYC_PROFILE_INTERVAL_MS is used.
+    """
+    if interval_ms is None:
+        interval_ms = os.environ.get("KYC_PROFILE_INTERVAL_MS") or DEFAULT_INTERVAL_MS
+    try:
+        value = float(interval_ms)
+    except (TypeError, ValueError):
+        value = math.nan
+    if not (math.isfinite(value) and value > 0):
+        logger.warning("Ignoring invalid profile interval %r, using %s ms", interval_ms, DEFAULT_INTERVAL_MS)
+        return DEFAULT_INTERVAL_MS
+    return value
+
+
+class InvocationProfile:
+    """Samples the invoking thread's stack and records wall/CPU time per tool call."""
+
+    def __init__(self, case_id: str, interval_ms: Optional[float] = None):
+        self.case_id = case_id
+        self.interval = max(_resolve_interval(interval_ms), 1.0) / 1000.0
+        self.stacks: Counter = Counter()
+        self.tools: dict = {}
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._token = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.location: Optional[dict] = None
+        self.save_error: Optional[str] = None
+
+    def __enter__(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._token = _active_profile.set(self)
+        self._sampler = threading.Thread(target=self._sample_loop, name="kyc-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._sampler.join()
+        _active_profile.reset(self._token)
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.thread_time() - self._cpu_start
+        # Save here so failed or timed-out invocations, the usual slow cases, keep their samples.
+        try:
+            self.location = self.save()
+        except Exception as e:
+            logger.exception("Failed to save invocation profile: %s", e)
+            self.save_error = str(e)
+        return False
+
+    def output_fields(self) -> dict:
+        """Return fields describing the saved profile, for the invocation response."""
+        if self.location is not None:
+            return {"profile_saved": True, "profile": self.location}
+        return {"profile_saved": False, "profile_error": self.save_error}
+
+    def _sample_loop(self):
+        # Only code objects are collected here; labels are built in collapsed().
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(codes)] += 1
+
+    def record_tool(self, tool_name: str, wall: float, cpu: float):
+        """Accumulate one tool call's wall and CPU time."""
+        entry = self.tools.setdefault(tool_name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+        entry["calls"] += 1
+        entry["wall_seconds"] += wall
+        entry["cpu_seconds"] += cpu
+
+    def collapsed(self) -> str:
+        """Return stacks in collapsed format ('frame;frame;frame count'), ready for flamegraph.pl/speedscope."""
+        # Labels are cached per profile so code objects are not kept alive past this invocation.
+        labels: dict = {}
+        folded: Counter = Counter()
+        for codes, count in self.stacks.items():
+            for code in codes:
+                if code not in labels:
+                    labels[code] = _code_label(code)
+            folded[";".join(labels[code] for code in reversed(codes))] += count
+        return "\n".join(f"{stack} {count}" for stack, count in folded.most_common()) + "\n"
+
+    def summary(self) -> dict:
+        """Return the wall-vs-CPU breakdown for the invocation and each tool."""
+        tools = {}
+        for tool_name, entry in self.tools.items():
+            tools[tool_name] = {
+                "calls": entry["calls"],
+                "wall_seconds": round(entry["wall_seconds"], 4),
+                "cpu_seconds": round(entry["cpu_seconds"], 4),
+                "wait_seconds": round(max(entry["wall_seconds"] - entry["cpu_seconds"], 0.0), 4),
+            }
+        return {
+            "case_id": self.case_id,
+            "sample_interval_ms": self.interval * 1000.0,
+            "samples": sum(self.stacks.values()),
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "tools": tools,
+        }
+
+    def save(self) -> dict:
+        """Write collapsed stacks and summary to KYC_PROFILE_DIR if set, else next to the screening report in S3."""
+        if not self.case_id or "/" in self.case_id or "\\" in self.case_id or ".." in self.case_id:
+            raise ValueError(f"Refusing to save profile for unsafe caseId {self.case_id!r}")
+        collapsed = self.collapsed()
+        summary = json.dumps(self.summary(), indent=2)
+        profile_dir = os.environ.get("KYC_PROFILE_DIR")
+        if profile_dir:
+            case_dir = os.path.join(profile_dir, self.case_id)
+            os.makedirs(case_dir, exist_ok=True)
+            stacks_path = os.path.join(case_dir, "screening-profile.collapsed")
+            summary_path = os.path.join(case_dir, "screening-profile.json")
+            with open(stacks_path, "w", encoding="utf-8") as f:
+                f.write(collapsed)
+            with open(summary_path, "w", encoding="utf-8") as f:
+                f.write(summary)
+            logger.info("Profile written to %s", case_dir)
+            return {"stacks": stacks_path, "summary": summary_path}
+
+        bucket = os.environ.get("KYC_RESULTS_BUCKET", "kyc-results")
+        stacks_key = f"cases/{self.case_id}/screening-profile.collapsed"
+        summary_key = f"cases/{self.case_id}/screening-profile.json"
+        s3 = boto3.client("s3")
+        s3.put_object(Bucket=bucket, Key=stacks_key, Body=collapsed.encode("utf-8"), ContentType="text/plain")
+        s3.put_object(Bucket=bucket, Key=summary_key, Body=summary.encode("utf-8"), ContentType="application/json")
+        logger.info("Profile uploaded to s3://%s/cases/%s/", bucket, self.case_id)
+        return {
+            "stacks": {"bucket": bucket, "key": stacks_key},
+            "summary": {"bucket": bucket, "key": summary_key},
+        }
+
+
+def profiled_tool(run):
+    """Decorate a tool's _run to record its wall/CPU time when the invocation is profiled."""
+
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return run(self, *args, **kwargs)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            return run(self, *args, **kwargs)
+        finally:
+            profile.record_tool(
+                self.name,
+                time.perf_counter() - wall_start,
+                time.thread_time() - cpu_start,
+            )
+
+    return wrapper
@@ -1,11 +1,13 @@
 import logging
 import os
+from contextlib import nullcontext
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from crew.crew import ResearchCrew
+from crew.profiling import InvocationProfile, should_profile
 import boto3
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 
@@ -40,6 +42,7 @@ def agent_invocation(payload):
     """
     Handler for KYC screening.
     Payload must include caseId. Optionally KYC_CASES_TABLE env var for DynamoDB table name.
+    Set "profile": true in the payload (or KYC_PROFILE_SAMPLE_RATE) to profile this invocation.
     Returns JSON with name, analysis_result, analysis_summary.
     """
     try:
@@ -50,12 +53,21 @@ def agent_invocation(payload):
 
         logger.info("KYC screening for caseId: %s", case_id)
 
-        research_crew_instance = ResearchCrew()
-        crew_instance = research_crew_instance.crew()
-        result = crew_instance.kickoff(inputs={"caseId": case_id})
-
-        logger.info("Result: %s", result.raw)
-        output = {"result": result.raw}
+        profile = InvocationProfile(case_id) if should_profile(payload) else None
+        try:
+            with profile or nullcontext():
+                research_crew_instance = ResearchCrew()
+                crew_instance = research_crew_instance.crew()
+                result = crew_instance.kickoff(inputs={"caseId": case_id})
+        except Exception as e:
+            logger.exception("Agent invocation failed")
+            output = {"error": str(e)}
+        else:
+            logger.info("Result: %s", result.raw)
+            output = {"result": result.raw}
+
+        if profile:
+            output.update(profile.output_fields())
         return output
 
     except Exception as e:
@@ -7,6 +7,8 @@ import boto3
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from crew.profiling import profiled_tool
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +27,7 @@ class GetCaseDetailsTool(BaseTool):
     )
     args_schema: Type[GetCaseDetailsInput] = GetCaseDetailsInput
 
+    @profiled_tool
     def _run(self, case_id: str) -> str:
         """Fetch case from DynamoDB by caseId."""
         logger.info("get_case_details input: case_id=%s", case_id)
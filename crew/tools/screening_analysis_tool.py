@@ -6,6 +6,9 @@ from typing import Type
 from crewai.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
+
+from crew.profiling import profiled_tool
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,7 @@ class ScreeningAnalysisTool(BaseTool):
     )
     args_schema: Type[ScreeningAnalysisInput] = ScreeningAnalysisInput
 
+    @profiled_tool
     def _run(self, case_details: str, search_results: str) -> str:
         """Analyze case and search results, produce screening analysis JSON."""
         logger.info("produce_screening_analysis input: case_details len=%s, search_results len=%s",
@@ -7,6 +7,8 @@ from langchain_tavily import TavilySearch
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from crew.profiling import profiled_tool
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,6 +31,7 @@ class SearchPersonTool(BaseTool):
     search: TavilySearch = Field(default_factory=TavilySearch)
     args_schema: Type[SearchPersonInput] = SearchPersonInput
 
+    @profiled_tool
     def _run(self, person_name: str, case_id: str = "") -> str:
         """Search the web for information about the person."""
         logger.info("search_person input: person_name=%s, case_id=%s", person_name, case_id)
@@ -0,0 +1,9 @@
+import sys
+import types
+
+# boto3 is only needed for the S3 upload path; stub it so the tests run without AWS dependencies.
+if "boto3" not in sys.modules:
+    try:
+        import boto3  # noqa: F401
+    except ImportError:
+        sys.modules["boto3"] = types.ModuleType("boto3")
@@ -0,0 +1,221 @@
+import importlib
+import json
+import sys
+import time
+import types
+
+import pytest
+
+import crew
+from crew import profiling
+from crew.profiling import InvocationProfile, profiled_tool, should_profile
+
+
+class FakeTool:
+    name = "fake_tool"
+
+    @profiled_tool
+    def _run(self, seconds: float = 0.0) -> str:
+        time.sleep(seconds)
+        return "done"
+
+
+@pytest.fixture(autouse=True)
+def _clean_env(monkeypatch):
+    for var in ("KYC_PROFILE_SAMPLE_RATE", "KYC_PROFILE_INTERVAL_MS", "KYC_PROFILE_DIR", "KYC_RESULTS_BUCKET"):
+        monkeypatch.delenv(var, raising=False)
+
+
+@pytest.mark.parametrize("flag", [True, 1, "true", "TRUE", "1"])
+def test_should_profile_explicit_flag(flag):
+    assert should_profile({"profile": flag}) is True
+
+
+@pytest.mark.parametrize("flag", [False, 0, 2, 1.5, "false", "0", "", None, "yes"])
+def test_should_profile_rejects_other_flags(flag):
+    assert should_profile({"profile": flag}) is False
+
+
+def test_should_profile_sample_rate(monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_SAMPLE_RATE", "1")
+    assert should_profile({}) is True
+    monkeypatch.setenv("KYC_PROFILE_SAMPLE_RATE", "0")
+    assert should_profile({}) is False
+
+
+def test_should_profile_invalid_sample_rate(monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_SAMPLE_RATE", "abc")
+    assert should_profile({}) is False
+
+
+def test_interval_from_env(monkeypatch):
+    assert InvocationProfile("c1").interval == profiling.DEFAULT_INTERVAL_MS / 1000.0
+    monkeypatch.setenv("KYC_PROFILE_INTERVAL_MS", "20")
+    assert InvocationProfile("c1").interval == 0.02
+
+
+@pytest.mark.parametrize("value", ["abc", "nan", "inf", "-inf", "-5", "0"])
+def test_invalid_interval_falls_back_to_default(monkeypatch, value):
+    monkeypatch.setenv("KYC_PROFILE_INTERVAL_MS", value)
+    assert InvocationProfile("c1").interval == profiling.DEFAULT_INTERVAL_MS / 1000.0
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -1.0, 0.0])
+def test_invalid_interval_argument_falls_back_to_default(value):
+    assert InvocationProfile("c1", interval_ms=value).interval == profiling.DEFAULT_INTERVAL_MS / 1000.0
+
+
+def test_profiled_tool_off_path_records_nothing():
+    profile = InvocationProfile("c1")
+    assert FakeTool()._run() == "done"
+    assert profile.tools == {}
+
+
+def test_profiled_tool_records_wall_and_cpu(tmp_path, monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(tmp_path))
+    with InvocationProfile("c1", interval_ms=1) as profile:
+        FakeTool()._run(0.02)
+        FakeTool()._run(0.02)
+
+    tool = profile.summary()["tools"]["fake_tool"]
+    assert tool["calls"] == 2
+    assert tool["wall_seconds"] >= 0.04
+    assert tool["cpu_seconds"] < tool["wall_seconds"]
+    assert tool["wait_seconds"] > 0
+
+
+def test_collapsed_output_format(tmp_path, monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(tmp_path))
+    with InvocationProfile("c1", interval_ms=1) as profile:
+        FakeTool()._run(0.05)
+
+    lines = profile.collapsed().strip().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert all(frame.endswith(")") for frame in stack.split(";"))
+    assert any("FakeTool._run" in line for line in lines)
+
+
+def test_save_to_profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(tmp_path))
+    with InvocationProfile("c1", interval_ms=1) as profile:
+        FakeTool()._run(0.01)
+
+    assert profile.output_fields() == {"profile_saved": True, "profile": profile.location}
+    case_dir = tmp_path / "c1"
+    summary = json.loads((case_dir / "screening-profile.json").read_text())
+    assert summary["case_id"] == "c1"
+    assert summary["tools"]["fake_tool"]["calls"] == 1
+    assert (case_dir / "screening-profile.collapsed").read_text() == profile.collapsed()
+
+
+def test_save_to_results_bucket(monkeypatch):
+    monkeypatch.setenv("KYC_RESULTS_BUCKET", "test-results")
+    uploads = []
+    s3 = types.SimpleNamespace(put_object=lambda **kwargs: uploads.append(kwargs))
+    monkeypatch.setattr(profiling.boto3, "client", lambda service: s3, raising=False)
+
+    with InvocationProfile("c1", interval_ms=1) as profile:
+        FakeTool()._run(0.01)
+
+    assert [(u["Bucket"], u["Key"], u["ContentType"]) for u in uploads] == [
+        ("test-results", "cases/c1/screening-profile.collapsed", "text/plain"),
+        ("test-results", "cases/c1/screening-profile.json", "application/json"),
+    ]
+    assert uploads[0]["Body"].decode("utf-8") == profile.collapsed()
+    assert json.loads(uploads[1]["Body"])["case_id"] == "c1"
+    assert profile.location == {
+        "stacks": {"bucket": "test-results", "key": "cases/c1/screening-profile.collapsed"},
+        "summary": {"bucket": "test-results", "key": "cases/c1/screening-profile.json"},
+    }
+
+
+@pytest.mark.parametrize("case_id", ["../../x", "a/b", "a\\b", ".."])
+def test_save_rejects_unsafe_case_id(tmp_path, monkeypatch, case_id):
+    profile_dir = tmp_path / "profiles"
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(profile_dir))
+    with InvocationProfile(case_id, interval_ms=1) as profile:
+        pass
+
+    fields = profile.output_fields()
+    assert fields["profile_saved"] is False
+    assert "unsafe caseId" in fields["profile_error"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_on_exception(tmp_path, monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with InvocationProfile("c1", interval_ms=1) as profile:
+            FakeTool()._run(0.01)
+            raise RuntimeError("timed out")
+
+    assert profile.output_fields()["profile_saved"] is True
+    assert (tmp_path / "c1" / "screening-profile.json").exists()
+
+
+@pytest.fixture
+def research_crew(monkeypatch):
+    """Import crew.research_crew with its crewai, AgentCore and dotenv dependencies stubbed."""
+
+    class FailingCrew:
+        def kickoff(self, inputs):
+            raise RuntimeError("kickoff timed out")
+
+    crew_module = types.ModuleType("crew.crew")
+    crew_module.ResearchCrew = lambda: types.SimpleNamespace(crew=FailingCrew)
+
+    dotenv = types.ModuleType("dotenv")
+    dotenv.load_dotenv = lambda: None
+
+    runtime = types.ModuleType("bedrock_agentcore.runtime")
+    runtime.BedrockAgentCoreApp = lambda: types.SimpleNamespace(entrypoint=lambda fn: fn)
+
+    # research_crew reads API keys from SSM at import time; keep that away from real AWS.
+    ssm = types.SimpleNamespace(get_parameter=lambda **kwargs: {"Parameter": {"Value": "dummy"}})
+    boto3 = types.ModuleType("boto3")
+    boto3.client = lambda service, **kwargs: ssm
+
+    monkeypatch.setitem(sys.modules, "boto3", boto3)
+    monkeypatch.setitem(sys.modules, "crew.crew", crew_module)
+    monkeypatch.setitem(sys.modules, "dotenv", dotenv)
+    monkeypatch.setitem(sys.modules, "bedrock_agentcore", types.ModuleType("bedrock_agentcore"))
+    monkeypatch.setitem(sys.modules, "bedrock_agentcore.runtime", runtime)
+    monkeypatch.setenv("OPENAI_API_KEY", "")
+    monkeypatch.setenv("TAVILY_API_KEY", "")
+    sys.modules.pop("crew.research_crew", None)
+    yield importlib.import_module("crew.research_crew")
+    # Drop the module built on the stubs so later imports get the real one.
+    sys.modules.pop("crew.research_crew", None)
+    if hasattr(crew, "research_crew"):
+        delattr(crew, "research_crew")
+
+
+def test_failed_kickoff_still_saves_profile(research_crew, tmp_path, monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(tmp_path))
+    output = research_crew.agent_invocation({"caseId": "c1", "profile": True})
+
+    assert output["error"] == "kickoff timed out"
+    assert output["profile_saved"] is True
+    assert (tmp_path / "c1" / "screening-profile.collapsed").exists()
+
+
+def test_invalid_interval_does_not_break_screening(research_crew, tmp_path, monkeypatch):
+    monkeypatch.setenv("KYC_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("KYC_PROFILE_INTERVAL_MS", "abc")
+    output = research_crew.agent_invocation({"caseId": "c1", "profile": True})
+
+    assert output["error"] == "kickoff timed out"
+    assert output["profile_saved"] is True
+
+
+def test_unprofiled_invocation_has_no_profile_fields(research_crew):
+    output = research_crew.agent_invocation({"caseId": "c1"})
+    assert output == {"error": "kickoff timed out"}
+
+
+def test_research_crew_fixture_is_removed_after_use():
+    assert "crew.research_crew" not in sys.modules
+    assert not hasattr(crew, "research_crew")